@@ -1,10 +1,53 @@
+import functools
+import queue
 import subprocess
 import os
+import threading
 import fiftyone as fo
 import fiftyone.zoo as foz
 from fiftyone.types import COCODetectionDataset
 
 
+# Hardware H.264 encoders in order of preference, with their fastest preset
+HARDWARE_ENCODERS = {
+    "h264_nvenc": ["-preset", "p1"],
+    "h264_qsv": ["-preset", "veryfast"],
+    "h264_videotoolbox": [],
+    "h264_amf": [],
+}
+
+
+@functools.lru_cache(maxsize=1)
+def get_h264_encoder():
+    """Return the ffmpeg encoder name and options to use, preferring a working hardware encoder."""
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-encoders"],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    for encoder, options in HARDWARE_ENCODERS.items():
+        if encoder not in result.stdout:
+            continue
+
+        # Builds often list encoders whose hardware is absent, so try a tiny encode
+        # with the same arguments convert_coco will use
+        probe = subprocess.run(
+            [
+                "ffmpeg", "-hide_banner", "-loglevel", "error",
+                "-f", "lavfi", "-hwaccel", "auto", "-i", "color=size=256x256:duration=0.1",
+                "-c:v", encoder, *options, "-pix_fmt", "yuv420p",
+                "-f", "null", "-"
+            ],
+            capture_output=True
+        )
+        if probe.returncode == 0:
+            return encoder, options
+
+    return "libx264", ["-preset", "ultrafast"]
+
+
 def convert_coco(
     coco_dataset_dir,
     output_dataset_name,
@@ -29,46 +72,97 @@ def convert_coco(
         name=temp_name
     )
 
-    dataset.sort_by("filepath")
+    frames_view = dataset.sort_by("filepath")
 
-    tmp_dir = os.path.join(coco_dataset_dir, "_tmp_frames")
-    os.makedirs(tmp_dir, exist_ok=True)
+    encoder, encoder_options = get_h264_encoder()
+    hwaccel = [] if encoder == "libx264" else ["-hwaccel", "auto"]
 
-    for i, sample in enumerate(dataset):
-        ext = os.path.splitext(sample.filepath)[1]
-        numbered = os.path.join(tmp_dir, f"frame_{i:06d}{ext}")
-
-        if not os.path.exists(numbered):
-            try:
-                os.symlink(sample.filepath, numbered)
-            except:
-                import shutil
-                shutil.copy(sample.filepath, numbered)
+    # A keyframe every second and no B-frames keeps seeking from the frontend cheap
+    gop = str(max(1, round(fps)))
+    gop_options = ["-g", gop, "-keyint_min", gop, "-sc_threshold", "0", "-bf", "0"]
+    if encoder == "libx264":
+        gop_options += ["-x264-params", f"keyint={gop}:min-keyint={gop}:scenecut=0:bframes=0"]
 
     cmd = [
         "ffmpeg",
         "-y",
         "-framerate", str(fps),
-        "-i", os.path.join(tmp_dir, "frame_%06d.jpg"),
-        "-c:v", "libx264",
+        "-f", "image2pipe",
+        "-vcodec", "mjpeg",
+        *hwaccel,
+        "-i", "-",
+        "-c:v", encoder,
+        *encoder_options,
         "-pix_fmt", "yuv420p",
+        *gop_options,
+        "-movflags", "+faststart",
         video_output_path
     ]
-    subprocess.run(cmd, check=True)
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+
+    # Stream the frames straight into ffmpeg rather than staging numbered copies on disk,
+    # reading the next files on a separate thread while ffmpeg consumes the current one
+    filepaths = frames_view.values("filepath")
+    frame_queue = queue.Queue(maxsize=8)
+    stop_reading = threading.Event()
+    read_errors = []
+
+    def read_frames():
+        try:
+            for filepath in filepaths:
+                if stop_reading.is_set():
+                    return
+                with open(filepath, "rb") as f:
+                    frame_queue.put(f.read())
+        except OSError as e:
+            read_errors.append(e)
+        finally:
+            frame_queue.put(None)
+
+    reader = threading.Thread(target=read_frames, daemon=True)
+    reader.start()
+
+    try:
+        try:
+            while (frame := frame_queue.get()) is not None:
+                proc.stdin.write(frame)
+        except BrokenPipeError:
+            # ffmpeg exited early; its return code below reports the failure
+            pass
+        finally:
+            # Drain the queue so the reader can never stay blocked on a full put
+            stop_reading.set()
+            while reader.is_alive():
+                try:
+                    frame_queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            reader.join()
+
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+    finally:
+        proc.wait()
+
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+
+    if read_errors:
+        raise read_errors[0]
 
     if fo.dataset_exists(output_dataset_name):
         fo.delete_dataset(output_dataset_name)
 
     video_dataset = fo.Dataset(output_dataset_name)
-    sample = fo.Sample(filepath=video_output_path)
-    sample["frames"] = {}
+    detections = frames_view.values("detections")
 
-    for i, img_sample in enumerate(dataset):
-        frame_num = i + 1
-        det = img_sample["detections"]
-        sample.frames[frame_num] = fo.Frame(detections=det)
+    sample = fo.Sample(filepath=video_output_path)
+    sample.frames.update({frame_num: fo.Frame() for frame_num in range(1, len(detections) + 1)})
 
     video_dataset.add_sample(sample)
+    video_dataset.set_values("frames.detections", [detections])
 
     dataset.delete()
 
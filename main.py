@@ -1,44 +1,104 @@
 import streamlit as st
 import os
-# import fiftyone as fo
+import fiftyone as fo
 import fiftyone.zoo as foz
-from fiftyone.types import COCODetectionDataset, FiftyOneVideoLabelsDataset
-import base64
+from fiftyone.types import COCODetectionDataset
 from convert_coco import convert_coco
 from testcomponent import testcomponent
+from video_server import get_video_data_url, get_video_url, is_browser_local
 
 
-FIFTYONE_DATASET_NAME = "quickstart-video"
+VIDEO_DATASET_NAME = "coco_video"
 
 
-def extract_detections_from_fiftyone(sample):
-    detections_by_frame = {}
+@st.cache_resource(show_spinner=False)
+def get_dataset(name):
+    try:
+        return fo.load_dataset(name)
+    except fo.core.dataset.DatasetNotFoundError:
+        # Import Dataset from fiftyone.zoo
+        quickstart = foz.load_zoo_dataset("quickstart")
 
-    for frame_number, frame in sample.frames.items():
-        if hasattr(frame, "detections") and frame.detections is not None:
-            frame_detections = []
+        coco_export_dir = "quickstart_coco_export"
+        os.makedirs(coco_export_dir, exist_ok=True)
 
-            for detection in frame.detections.detections:
-                bbox = detection.bounding_box
-                
-                frame_detections.append({
-                    "x": bbox[0],
-                    "y": bbox[1],
-                    "width": bbox[2],
-                    "height": bbox[3],
-                    "label": detection.label,
-                    "confidence": detection.confidence if hasattr(detection, "confidence") else 1.0
-                })
+        # Export fiftyone.zoo dataset and export as COCODetectionDataset
+        quickstart.export(
+            export_dir=coco_export_dir,
+            dataset_type=COCODetectionDataset,
+            label_field="ground_truth"
+        )
 
-            detections_by_frame[frame_number - 1] = frame_detections
+        # Convert COCODetectionDataset to FiftyOneVideoLabelsDataset
+        return convert_coco(
+            coco_dataset_dir=coco_export_dir,
+            output_dataset_name=name,
+            fps=5
+        )
 
-    return detections_by_frame
 
-def render_video_with_detections(src, detections, seek_to=None, fps=30, selected_segments=[], key=None):
-    with open(src, "rb") as f:
-        video_bytes = f.read()
-    video_base64 = base64.b64encode(video_bytes).decode()
-    video_url = f"data:video/mp4;base64,{video_base64}"
+@st.cache_data(show_spinner=False)
+def extract_detections_from_fiftyone(dataset_name, sample_id, last_modified_at):
+    # last_modified_at is only part of the cache key so edits to the sample invalidate it
+    view = fo.load_dataset(dataset_name).select(sample_id)
+
+    # Pull every frame's boxes in one aggregation rather than materializing each Detection
+    frame_widths, frame_heights, frame_numbers, bboxes, labels, confidences = view.aggregate([
+        fo.Values("metadata.frame_width"),
+        fo.Values("metadata.frame_height"),
+        fo.Values("frames.frame_number"),
+        fo.Values("frames.detections.detections.bounding_box"),
+        fo.Values("frames.detections.detections.label"),
+        fo.Values("frames.detections.detections.confidence"),
+    ])
+
+    frame_width, frame_height = frame_widths[0], frame_heights[0]
+
+    # Flat per-detection arrays: the boxes for frames[k] are bbox[4 * offsets[k]:4 * offsets[k + 1]],
+    # in integer pixels rather than normalized floats
+    frames = []
+    offsets = [0]
+    bbox = []
+    label_ids = []
+    confidence = []
+    label_index = {}
+
+    for frame_number, frame_bboxes, frame_labels, frame_confidences in zip(
+        frame_numbers[0], bboxes[0], labels[0], confidences[0]
+    ):
+        if not frame_bboxes:
+            continue
+
+        frames.append(frame_number - 1)
+        for x, y, width, height in frame_bboxes:
+            bbox.extend((
+                round(x * frame_width),
+                round(y * frame_height),
+                round(width * frame_width),
+                round(height * frame_height),
+            ))
+        label_ids.extend(label_index.setdefault(label, len(label_index)) for label in frame_labels)
+        confidence.extend(c if c is not None else 1.0 for c in frame_confidences)
+        offsets.append(len(confidence))
+
+    return {
+        "frame_width": frame_width,
+        "frame_height": frame_height,
+        "frames": frames,
+        "offsets": offsets,
+        "bbox": bbox,
+        "labels": label_ids,
+        "label_names": list(label_index),
+        "confidence": confidence,
+    }
+
+@st.cache_resource(show_spinner=False)
+def compute_dataset_metadata(dataset_name, created_at, _dataset):
+    # Probe every video concurrently once so selecting a sample never waits on ffprobe
+    _dataset.compute_metadata(num_workers=os.cpu_count(), skip_failures=True)
+
+def render_video_with_detections(src, detections, seek_to=None, fps=30, selected_segments=[], key=None, embed_video=False):
+    video_url = get_video_data_url(src) if embed_video else get_video_url(src)
 
     component_output = testcomponent(
         src=video_url,
@@ -52,68 +112,54 @@ def render_video_with_detections(src, detections, seek_to=None, fps=30, selected
     return component_output
 
 
-def main():
-    if "seek_ts" not in st.session_state:
-        st.session_state.seek_ts = 0
-
-    with st.spinner("Loading dataset..."):
-        # try:
-        #     dataset = fo.load_dataset(FIFTYONE_DATASET_NAME)
-        #     st.toast(f"Loaded existing dataset: {dataset.name}", icon="✅")
-        # except:
-        #     st.toast(f"Downloading dataset from FiftyOne Zoo...")
-        #     import fiftyone.zoo as foz
-        #     dataset = foz.load_zoo_dataset(FIFTYONE_DATASET_NAME)
-        #     st.toast(f"Loaded existing dataset: {dataset.name}", icon="✅")
-
-        # Import Dataset from fiftyone.zoo
-        output_dataset_name="coco_video"
-
-        quickstart = foz.load_zoo_dataset("quickstart")
-
-        coco_export_dir = "quickstart_coco_export"
-        os.makedirs(coco_export_dir, exist_ok=True)
+def reset_seek_ts():
+    """Start a newly selected video from the beginning rather than the previous video's seek time."""
+    st.session_state.seek_ts = 0.0
 
-        # Export fiftyone.zoo dataset and export as COCODetectionDataset
-        quickstart.export(
-            export_dir=coco_export_dir,
-            dataset_type=COCODetectionDataset,
-            label_field="ground_truth"
-        )
 
-        # Convert COCODetectionDataset to FiftyOneVideoLabelsDataset
-        dataset = convert_coco(
-            coco_dataset_dir=coco_export_dir,
-            output_dataset_name=output_dataset_name,
-            fps=5
-        )
+def main():
+    st.session_state.setdefault("seek_ts", 0.0)
 
+    with st.spinner("Loading dataset..."):
+        dataset = get_dataset(VIDEO_DATASET_NAME)
         st.toast(f"Loaded existing dataset: {dataset.name}", icon="✅")
 
-
     st.header("Bounding Box Video Component")
 
-    sample = dataset.first()
-    video_samples = list(dataset)
-    if not video_samples:
+    with st.spinner("Computing video metadata"):
+        compute_dataset_metadata(dataset.name, dataset.created_at, dataset)
+
+    # Build the sample list once per dataset rather than on every rerun
+    dataset_key = (dataset.name, dataset.created_at)
+    if st.session_state.get("sample_names_dataset") != dataset_key:
+        sample_ids, filepaths = dataset.values(["id", "filepath"])
+        st.session_state.sample_ids = sample_ids
+        st.session_state.sample_names = [
+            f"Video {i + 1}: {os.path.basename(filepath)}" for i, filepath in enumerate(filepaths)
+        ]
+        st.session_state.sample_names_dataset = dataset_key
+
+    sample_ids = st.session_state.sample_ids
+    sample_names = st.session_state.sample_names
+    if not sample_ids:
         st.error("No video samples found in dataset")
         return
 
     st.sidebar.markdown(f"""
     **Dataset Metadata**
     - Dataset name: {dataset.name}
-    - Total videos: {len(video_samples)}
+    - Total videos: {len(sample_ids)}
     - Media type: {dataset.media_type}
     """)
 
     # Make this selection a single row selection from a dataframe
-    sample_names = [f"Video {i + 1}: {s.filepath.split("/")[-1]}" for i, s in enumerate(video_samples)]
     selected_idx = st.sidebar.selectbox(
         "**Select Video**",
         range(len(sample_names)),
-        format_func=lambda i: sample_names[i]
+        format_func=lambda i: sample_names[i],
+        on_change=reset_seek_ts
     )
-    sample = video_samples[selected_idx]
+    sample = dataset[sample_ids[selected_idx]]
 
     if sample.metadata is None:
         with st.spinner("Computing video metadata"):
@@ -131,32 +177,40 @@ def main():
     st.sidebar.metric("Duration", f"{duration:.2f}s")
     st.sidebar.metric("Resolution", resolution)
 
+    st.sidebar.divider()
+    embed_video = st.sidebar.toggle(
+        "Embed video in page",
+        value=not is_browser_local(),
+        help="Send the video inside the page instead of streaming it from a server on localhost. "
+             "Needed when the browser is on another machine or the app is served over HTTPS."
+    )
+
     with st.spinner("Extracting detections..."):
-        detections = extract_detections_from_fiftyone(sample)
+        detections = extract_detections_from_fiftyone(dataset.name, sample.id, sample.last_modified_at)
 
-    st.info(f"Successfully loaded {len(detections)} frames with detections", icon="📊")
+    frames_with_detections = len(detections["frames"])
+    total_detections = detections["offsets"][-1]
+
+    st.info(f"Successfully loaded {frames_with_detections} frames with detections", icon="📊")
 
-    total_detections = sum(len(dets) for dets in detections.values())
     col1, col2, col3 = st.columns(3)
     with col1:
         st.metric("Total Detections", total_detections)
     with col2:
-        st.metric("Frames with Detections", len(detections))
+        st.metric("Frames with Detections", frames_with_detections)
     with col3:
-        avg_per_frame = total_detections / len(detections) if detections else 0
+        avg_per_frame = total_detections / frames_with_detections if frames_with_detections else 0
         st.metric("Average detections per frame", f"{avg_per_frame:.1f}")
 
-    all_labels = set()
-    for frame_dets in detections.values():
-        for det in frame_dets:
-            all_labels.add(det["label"])
-
-    if all_labels:
-        st.markdown(f"**Detected classes:** {', '.join(sorted(all_labels))}")
+    if detections["label_names"]:
+        st.markdown(f"**Detected classes:** {', '.join(sorted(detections['label_names']))}")
 
     st.divider()
 
-    st.session_state.seek_ts = st.text_input("Seek to: ", value=st.session_state.seek_ts)
+    # Only rerun the script when a seek is submitted, not on every edit of the input
+    with st.form("seek_form"):
+        st.number_input("Seek to: ", key="seek_ts", min_value=0.0, step=0.5)
+        st.form_submit_button("Go")
 
     render_video_with_detections(
         src=sample.filepath,
@@ -164,6 +218,8 @@ def main():
         detections=detections,
         seek_to=st.session_state.seek_ts,
         fps=fps,
+        key=sample.id,
+        embed_video=embed_video,
     )
 
 if __name__ == "__main__":
@@ -1,10 +1,16 @@
+import functools
+
 import streamlit as st
 
-out = st.components.v2.component(
-    "testcomponent.testcomponent",
-    js="index-*.js",
-    html='<div class="react-root"></div>',
-)
+
+@functools.lru_cache(maxsize=1)
+def _get_component():
+    """Register the component once and reuse the handle on every call."""
+    return st.components.v2.component(
+        "testcomponent.testcomponent",
+        js="index-*.js",
+        html='<div class="react-root"></div>',
+    )
 
 
 def on_current_timestamp_change():
@@ -24,7 +30,7 @@ def on_current_frame_change():
 # The wrapper allows us to customize our component's API: we can pre-process its
 # input args, post-process its output value, and add a docstring for users.
 def testcomponent(src, seek_to, detections, fps, selected_segments=[], key=None):
-    component_value = out(
+    component_value = _get_component()(
         key=key,
         default={"current_timestamp": 0, "current_frame": 0},
         data={"seek_to": seek_to, "src": src, "detections": detections, "fps": fps, "selected_segments": selected_segments},
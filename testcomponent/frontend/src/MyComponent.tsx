@@ -5,7 +5,8 @@ import {
   useCallback,
   useState,
   useRef,
-  useEffect
+  useEffect,
+  useMemo
 } from "react";
 
 interface SegmentData {
@@ -25,6 +26,23 @@ export type Detection = {
   confidence: number;
 }
 
+/**
+ * Detections packed as parallel arrays: the boxes for frames[k] are
+ * bbox[4 * offsets[k]] up to bbox[4 * offsets[k + 1]], with one label id and
+ * confidence per box. Boxes are integer pixels in a frame_width x frame_height
+ * frame.
+ */
+export type DetectionPayload = {
+  frame_width: number;
+  frame_height: number;
+  frames: Array<number>;
+  offsets: Array<number>;
+  bbox: Array<number>;
+  labels: Array<number>;
+  label_names: Array<string>;
+  confidence: Array<number>;
+}
+
 export type MyComponentStateShape = {
   current_timestamp: number;
   current_frame: number;
@@ -37,7 +55,7 @@ interface SelectedSegment {
 
 export type MyComponentDataShape = {
   seek_to?: number;
-  detections: Record<number, Array<Detection>>;
+  detections: DetectionPayload;
   fps: number;
   src: string;
   selected_segments: Array<SelectedSegment>;
@@ -80,6 +98,34 @@ const MyComponent: FC<MyComponentProps> = ({
   const [hoveredSegment, setHoveredSegment] = useState<number | null>(null);
   const [hoveredHighlightedSegment, setHoveredHighlightedSegment] = useState<number | null>(null);
 
+  // Typed views over the payload plus a frame -> slot lookup, rebuilt only when detections change
+  const packed = useMemo(() => ({
+    bbox: Int16Array.from(detections.bbox),
+    labels: Uint32Array.from(detections.labels),
+    confidence: Float32Array.from(detections.confidence),
+    frameSlots: new Map(detections.frames.map((frame, k) => [frame, k] as const)),
+  }), [detections]);
+
+  const getFrameDetections = (frame: number): Array<Detection> => {
+    const k = packed.frameSlots.get(frame);
+
+    if (k === undefined) { return []; }
+
+    const frameDetections: Array<Detection> = [];
+    for (let i = detections.offsets[k]; i < detections.offsets[k + 1]; i++) {
+      frameDetections.push({
+        x: packed.bbox[4 * i],
+        y: packed.bbox[4 * i + 1],
+        width: packed.bbox[4 * i + 2],
+        height: packed.bbox[4 * i + 3],
+        label: detections.label_names[packed.labels[i]],
+        confidence: packed.confidence[i],
+      });
+    }
+
+    return frameDetections;
+  }
+
   useEffect(() => {
     if (seek_to && videoRef.current) {
       videoRef.current.currentTime = seek_to;
@@ -97,18 +143,22 @@ const MyComponent: FC<MyComponentProps> = ({
 
       if (!ctx) { return; }
 
-      const frameDetections = detections[currentFrame] || [];
+      const frameDetections = getFrameDetections(currentFrame);
       ctx?.clearRect(0, 0, canvas.width, canvas.height)
 
       const { videoWidth, videoHeight } = video;
 
       if (videoWidth === 0 || videoHeight === 0) { return; }
 
+      // Boxes are already in pixels; only rescale if the video differs from the frame size
+      const scaleX = videoWidth / detections.frame_width;
+      const scaleY = videoHeight / detections.frame_height;
+
       frameDetections.forEach((det) => {
-        const x = det.x * videoWidth;
-        const y = det.y * videoHeight;
-        const width = det.width * videoWidth;
-        const height = det.height * videoHeight;
+        const x = det.x * scaleX;
+        const y = det.y * scaleY;
+        const width = det.width * scaleX;
+        const height = det.height * scaleY;
 
         const color = getColorForLabel(det.label);
 
@@ -130,7 +180,7 @@ const MyComponent: FC<MyComponentProps> = ({
         ctx.fillText(label, x + padding, y - (textHeight - padding / 2));
       })
     })();
-  }, [currentFrame, detections]);
+  }, [currentFrame, packed]);
 
   const getColorForLabel = (label: string) => {
     let hash = 0;
@@ -161,11 +211,12 @@ const MyComponent: FC<MyComponentProps> = ({
     const density = new Array(numBuckets).fill(0);
     const detectionCounts = new Array(numBuckets).fill(0);
 
-    Object.entries(detections).forEach(([frameNum, dets]) => {
-      const bucketIndex = Math.floor(parseInt(frameNum) / bucketSize);
+    detections.frames.forEach((frameNum, k) => {
+      const bucketIndex = Math.floor(frameNum / bucketSize);
+      const count = detections.offsets[k + 1] - detections.offsets[k];
       if (bucketIndex < numBuckets) {
-        density[bucketIndex] += dets.length;
-        detectionCounts[bucketIndex] += dets.length;
+        density[bucketIndex] += count;
+        detectionCounts[bucketIndex] += count;
       }
     });
 
@@ -181,8 +232,9 @@ const MyComponent: FC<MyComponentProps> = ({
     }));
   };
 
+  const currentDetections = getFrameDetections(currentFrame);
+
   const getClassDistribution = (): Array<[string, number]> => {
-    const currentDetections = detections[currentFrame] || [];
     const distribution: { [key: string]: number } = {};
 
     currentDetections.forEach((detection) => {
@@ -194,7 +246,6 @@ const MyComponent: FC<MyComponentProps> = ({
 
   const detectionDensity = getDetectionDensity();
   const classDistribution = getClassDistribution();
-  const currentDetections = detections[currentFrame] || [];
 
   /**
    * Click handler for the button
@@ -717,7 +768,7 @@ const MyComponent: FC<MyComponentProps> = ({
                       fontFamily: "monospace"
                     }}
                   >
-                    [{(det.x * 100).toFixed(0)}, {(det.y * 100).toFixed(0)}]
+                    [{det.x}, {det.y}]
                   </span>
                 </div>
               </div>
@@ -0,0 +1,156 @@
+import base64
+import functools
+import mimetypes
+import os
+import threading
+import urllib.parse
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import streamlit as st
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """Static file handler that honours single ``Range: bytes=...`` requests.
+
+    The browser's video element relies on range requests to seek, which
+    ``SimpleHTTPRequestHandler`` does not support on its own. Only the file
+    names registered in ``server.served_files`` are served; everything else in
+    the directory, including listings, is a 404.
+    """
+
+    _range_length = None
+
+    def send_head(self):
+        self._range_length = None
+
+        name = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path).lstrip("/")
+        if name not in self.server.served_files:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+
+        range_header = self.headers.get("Range")
+
+        if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+            return super().send_head()
+
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            return super().send_head()
+
+        try:
+            f = open(path, "rb")
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+
+        size = os.fstat(f.fileno()).st_size
+        start, _, end = range_header[len("bytes="):].strip().partition("-")
+
+        try:
+            if start:
+                start = int(start)
+                end = int(end) if end else size - 1
+            else:
+                start = size - int(end)
+                end = size - 1
+        except ValueError:
+            f.close()
+            return super().send_head()
+
+        start = max(start, 0)
+        end = min(end, size - 1)
+
+        if start > end:
+            f.close()
+            self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.end_headers()
+            return None
+
+        self.send_response(HTTPStatus.PARTIAL_CONTENT)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+
+        f.seek(start)
+        self._range_length = end - start + 1
+
+        return f
+
+    def copyfile(self, source, outputfile):
+        if self._range_length is None:
+            return super().copyfile(source, outputfile)
+
+        remaining = self._range_length
+        while remaining > 0:
+            chunk = source.read(min(remaining, 64 * 1024))
+            if not chunk:
+                break
+            outputfile.write(chunk)
+            remaining -= len(chunk)
+
+    def list_directory(self, path):
+        self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+        return None
+
+    def log_message(self, format, *args):
+        pass
+
+
+@st.cache_resource(show_spinner=False)
+def get_video_server(directory):
+    """Start (once per directory) a background HTTP server rooted at ``directory``."""
+    handler = functools.partial(RangeRequestHandler, directory=directory)
+    server = ThreadingHTTPServer(("localhost", 0), handler)
+    server.served_files = set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+
+def get_video_url(src):
+    """Return a URL the browser can stream ``src`` from without embedding it in the page."""
+    directory, name = os.path.split(os.path.abspath(src))
+    server = get_video_server(directory)
+    server.served_files.add(name)
+
+    return f"http://localhost:{server.server_port}/{urllib.parse.quote(name)}"
+
+
+def is_browser_local():
+    """Whether the app is viewed over plain HTTP from the server host, so localhost video URLs are reachable."""
+    url = urllib.parse.urlsplit(st.context.url or "")
+
+    return url.scheme == "http" and url.hostname in ("localhost", "127.0.0.1", "::1")
+
+
+@functools.lru_cache(maxsize=4)
+def _encode_data_url(src, mtime):
+    mime_type = mimetypes.guess_type(src)[0] or "video/mp4"
+    prefix = f"data:{mime_type};base64,".encode("ascii")
+    size = os.path.getsize(src)
+
+    # Encode straight into one buffer after the prefix so only a single decode copy is made
+    out = bytearray(len(prefix) + ((size + 2) // 3) * 4)
+    out[:len(prefix)] = prefix
+    view = memoryview(out)
+    pos = len(prefix)
+
+    with open(src, "rb") as f:
+        # Chunks are a multiple of 3 bytes so only the final one can be padded
+        while chunk := f.read(3 * 64 * 1024):
+            encoded = base64.b64encode(chunk)
+            view[pos:pos + len(encoded)] = encoded
+            pos += len(encoded)
+
+    view.release()
+
+    return out.decode("ascii")
+
+
+def get_video_data_url(src):
+    """Return ``src`` embedded as a base64 data URL, for browsers that cannot reach the local server."""
+    return _encode_data_url(src, os.path.getmtime(src))